@@ -8,6 +8,7 @@ import time
 import copy 
 from streamlit_option_menu import option_menu
 from streamlit_gsheets import GSheetsConnection
+from nucleo_pontuacao import DEFAULT_CONFIG, chave_pesos, mesclar_config, calcular_nota, calcular_notas_df
 
 # ==============================================================================
 # 1. CONSTANTES E CONFIGURAÇÕES GLOBAIS
@@ -28,24 +29,6 @@ COLOR_GOOD = "#228B22"          # Verde (Bom)
 COLOR_EXCELLENT = "#006400"     # Verde Escuro (Excelente)
 COLOR_HIGHLIGHT = "#006400"
 
-# Configuração Base
-DEFAULT_CONFIG = {
-    'pesos_fornecedores': {
-        'Conformidade Técnica': 1.0, 'Durabilidade': 1.0,
-        'Pontualidade': 1.0, 'Estoque': 1.0, 'Embalagem': 1.0,
-        'Preço': 1.0, 'Pagamento': 1.0, 'Suporte': 1.0, 'Comunicação': 1.0
-    },
-    'pesos_produtos': {
-        'Rentabilidade': 1.0, 
-        'Qualidade Material': 1.0, 'Custo-Benefício': 1.0,
-        'Durabilidade': 1.0, 'Acabamento': 1.0, 'Disponibilidade': 1.0,
-        'Inovação': 1.0, 'Embalagem': 1.0, 'Sustentabilidade': 1.0
-    },
-    'tipo_periodo': 'Trimestral',
-    'anos_disponiveis': [2024, 2025, 2026],
-    'autosave': True
-}
-
 # --- NOVO: GUIA DE REFERÊNCIA BASEADO NAS IMAGENS ---
 GUIA_CRITERIOS = {
     "Pontualidade": {
@@ -208,23 +191,7 @@ class DataManager:
             df = self.conn.read(worksheet="config", ttl=0)
             if not df.empty and 'JSON_DUMP' in df.columns:
                 json_str = df.iloc[0]['JSON_DUMP']
-                loaded = json.loads(json_str)
-                
-                # FUSÃO INTELIGENTE: Começa com o padrão
-                config = copy.deepcopy(DEFAULT_CONFIG)
-                
-                # Atualiza campos simples
-                for k, v in loaded.items():
-                    if k not in ['pesos_fornecedores', 'pesos_produtos']:
-                        config[k] = v
-                
-                # Atualiza pesos preservando novos campos do Default
-                if 'pesos_fornecedores' in loaded:
-                    config['pesos_fornecedores'].update(loaded['pesos_fornecedores'])
-                if 'pesos_produtos' in loaded:
-                    config['pesos_produtos'].update(loaded['pesos_produtos'])
-                    
-                return config
+                return mesclar_config(json.loads(json_str))
         except:
             pass
         return copy.deepcopy(DEFAULT_CONFIG)
@@ -246,16 +213,7 @@ class DataManager:
             return False
 
     def calcular_nota(self, dados_dict, tipo):
-        key = 'pesos_fornecedores' if tipo == 'fornecedor' else 'pesos_produtos'
-        pesos_atuais = self.config[key]
-        soma_ponderada = 0
-        soma_pesos = sum(pesos_atuais.values())
-        for criterio, peso in pesos_atuais.items():
-            if criterio in dados_dict:
-                val = pd.to_numeric(dados_dict[criterio], errors='coerce')
-                if pd.isna(val): val = 0.0
-                soma_ponderada += (val * peso)
-        return soma_ponderada / soma_pesos if soma_pesos > 0 else 0.0
+        return calcular_nota(dados_dict, self.config[chave_pesos(tipo)])
 
     def get_periodos(self):
         if self.config['tipo_periodo'] == 'Trimestral':
@@ -264,9 +222,9 @@ class DataManager:
 
     def recalcular_tudo(self):
         if not self.df_aval_forn.empty:
-            self.df_aval_forn['Score Final'] = self.df_aval_forn.apply(lambda row: self.calcular_nota(row, 'fornecedor'), axis=1)
+            self.df_aval_forn['Score Final'] = calcular_notas_df(self.df_aval_forn, self.config[chave_pesos('fornecedor')])
         if not self.df_aval_prod.empty:
-            self.df_aval_prod['Score Final'] = self.df_aval_prod.apply(lambda row: self.calcular_nota(row, 'produto'), axis=1)
+            self.df_aval_prod['Score Final'] = calcular_notas_df(self.df_aval_prod, self.config[chave_pesos('produto')])
 
 # ==============================================================================
 # 4. DASHBOARD
@@ -0,0 +1,71 @@
+import copy
+
+import pandas as pd
+
+# ==============================================================================
+# NÚCLEO DE PONTUAÇÃO (sem dependência do Streamlit)
+# Compartilhado entre o app (analiseupdate.py) e o processamento em lote (pontuar_lote.py)
+# ==============================================================================
+
+# Configuração Base
+DEFAULT_CONFIG = {
+    'pesos_fornecedores': {
+        'Conformidade Técnica': 1.0, 'Durabilidade': 1.0,
+        'Pontualidade': 1.0, 'Estoque': 1.0, 'Embalagem': 1.0,
+        'Preço': 1.0, 'Pagamento': 1.0, 'Suporte': 1.0, 'Comunicação': 1.0
+    },
+    'pesos_produtos': {
+        'Rentabilidade': 1.0,
+        'Qualidade Material': 1.0, 'Custo-Benefício': 1.0,
+        'Durabilidade': 1.0, 'Acabamento': 1.0, 'Disponibilidade': 1.0,
+        'Inovação': 1.0, 'Embalagem': 1.0, 'Sustentabilidade': 1.0
+    },
+    'tipo_periodo': 'Trimestral',
+    'anos_disponiveis': [2024, 2025, 2026],
+    'autosave': True
+}
+
+
+def chave_pesos(tipo):
+    return 'pesos_fornecedores' if tipo == 'fornecedor' else 'pesos_produtos'
+
+
+def mesclar_config(loaded):
+    # FUSÃO INTELIGENTE: Começa com o padrão
+    config = copy.deepcopy(DEFAULT_CONFIG)
+
+    # Atualiza campos simples
+    for k, v in loaded.items():
+        if k not in ['pesos_fornecedores', 'pesos_produtos']:
+            config[k] = v
+
+    # Atualiza pesos preservando novos campos do Default
+    if 'pesos_fornecedores' in loaded:
+        config['pesos_fornecedores'].update(loaded['pesos_fornecedores'])
+    if 'pesos_produtos' in loaded:
+        config['pesos_produtos'].update(loaded['pesos_produtos'])
+
+    return config
+
+
+def calcular_nota(dados_dict, pesos):
+    soma_ponderada = 0
+    soma_pesos = sum(pesos.values())
+    for criterio, peso in pesos.items():
+        if criterio in dados_dict:
+            val = pd.to_numeric(dados_dict[criterio], errors='coerce')
+            if pd.isna(val): val = 0.0
+            soma_ponderada += (val * peso)
+    return soma_ponderada / soma_pesos if soma_pesos > 0 else 0.0
+
+
+def calcular_notas_df(df, pesos):
+    # Mesma regra de calcular_nota, vetorizada por coluna (critério ausente conta como 0)
+    soma_pesos = sum(pesos.values())
+    if soma_pesos <= 0:
+        return pd.Series(0.0, index=df.index)
+    soma_ponderada = pd.Series(0.0, index=df.index)
+    for criterio, peso in pesos.items():
+        if criterio in df.columns:
+            soma_ponderada += pd.to_numeric(df[criterio], errors='coerce').fillna(0.0) * peso
+    return soma_ponderada / soma_pesos
@@ -0,0 +1,437 @@
+import argparse
+import copy
+import io
+import json
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from nucleo_pontuacao import DEFAULT_CONFIG, chave_pesos, mesclar_config, calcular_notas_df
+
+# ==============================================================================
+# PONTUAÇÃO EM LOTE (sem Streamlit / sem Google Sheets)
+# Reprocessa exportações locais (CSV/Parquet) de avaliações com os pesos da config.
+#
+# Exemplo:
+#   python pontuar_lote.py avaliacoes.csv --tipo fornecedor --config config.csv \
+#       --peso "Preço=2" --saida avaliacoes_pontuadas.parquet --agregados ranking.csv --processos 4
+# ==============================================================================
+
+COL_SCORE = 'Score Final'
+COLS_AGREGADOS = ['Avaliações', 'Score Médio', 'Score Mínimo', 'Score Máximo']
+TAMANHO_LOTE_PADRAO = 100_000
+
+
+def _formato(caminho):
+    sufixo = Path(caminho).suffix.lower()
+    if sufixo in ('.parquet', '.pq'): return 'parquet'
+    if sufixo == '.csv': return 'csv'
+    raise ValueError(f"Formato não suportado: {caminho} (use .csv ou .parquet)")
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Arquivos Parquet exigem o pacote 'pyarrow' (pip install pyarrow).") from None
+    return pa, pq
+
+
+# ------------------------------------------------------------------------------
+# Configuração
+# ------------------------------------------------------------------------------
+
+def carregar_config(caminho=None):
+    if caminho is None:
+        return copy.deepcopy(DEFAULT_CONFIG)
+
+    if Path(caminho).suffix.lower() == '.json':
+        with open(caminho, encoding='utf-8') as f:
+            return mesclar_config(json.load(f))
+
+    # Exportação da aba "config" da planilha: JSON na coluna JSON_DUMP
+    if _formato(caminho) == 'parquet':
+        _importar_pyarrow()
+        df = pd.read_parquet(caminho)
+    else:
+        df = pd.read_csv(caminho)
+    if df.empty or 'JSON_DUMP' not in df.columns:
+        raise ValueError(f"{caminho} não contém a coluna JSON_DUMP.")
+    return mesclar_config(json.loads(df.iloc[0]['JSON_DUMP']))
+
+
+def aplicar_pesos(config, tipo, pares):
+    pesos = config[chave_pesos(tipo)]
+    for par in pares or []:
+        criterio, sep, valor = par.partition('=')
+        if not sep or not criterio.strip():
+            raise ValueError(f"Peso inválido: '{par}' (use Critério=valor)")
+        try:
+            peso = float(valor)
+        except ValueError:
+            peso = None
+        if peso is None or not math.isfinite(peso):
+            raise ValueError(f"Peso inválido para '{criterio.strip()}': '{valor}'")
+        pesos[criterio.strip()] = peso
+    return pesos
+
+
+# ------------------------------------------------------------------------------
+# Leitura em fatias
+# CSV: cada processo lê a sua faixa de bytes. Parquet: o processo principal lê os
+# lotes (iter_batches) e envia aos processos só as colunas usadas na pontuação.
+# ------------------------------------------------------------------------------
+
+def _colunas(caminho):
+    if _formato(caminho) == 'parquet':
+        _, pq = _importar_pyarrow()
+        return pq.ParquetFile(caminho).schema_arrow.names
+    return list(pd.read_csv(caminho, nrows=0).columns)
+
+
+def _bytes_por_fatia(caminho, tamanho_lote):
+    # Estima o tamanho médio de linha pelo início do arquivo
+    with open(caminho, 'rb') as f:
+        amostra = f.read(1 << 16)
+    linhas = max(amostra.count(b'\n'), 1)
+    return max(len(amostra) // linhas * tamanho_lote, 1)
+
+
+def _termina_entre_aspas(linha, entre_aspas):
+    # Mesma regra do leitor C do pandas: aspas só abrem um campo quando são o primeiro
+    # caractere dele; dentro de aspas, "" é uma aspa literal
+    inicio_campo = not entre_aspas
+    i, n = 0, len(linha)
+    while i < n:
+        c = linha[i:i + 1]
+        if entre_aspas:
+            if c == b'"':
+                if linha[i + 1:i + 2] == b'"': i += 1
+                else: entre_aspas = False
+        elif c == b'"' and inicio_campo:
+            entre_aspas = True
+        inicio_campo = c == b',' and not entre_aspas
+        i += 1
+    return entre_aspas
+
+
+def _fatias_csv(caminho, bytes_por_fatia):
+    # Corta sempre em fim de registro, nunca dentro de um campo entre aspas
+    with open(caminho, 'rb') as f:
+        pos = 0
+        entre_aspas = False
+
+        # Cabeçalho: o pandas ignora linhas em branco antes dele
+        while True:
+            linha = f.readline()
+            if not linha: break
+            pos += len(linha)
+            if not entre_aspas and not linha.strip(): continue
+            entre_aspas = _termina_entre_aspas(linha, entre_aspas)
+            if not entre_aspas: break
+
+        inicio = pos
+        resto = b''
+        while True:
+            bloco = f.read(1 << 20)
+            dados = resto + bloco
+            if bloco:
+                corte = dados.rfind(b'\n') + 1
+                completas, resto = dados[:corte], dados[corte:]
+            else:
+                completas, resto = dados, b''
+            base = pos
+
+            if not entre_aspas and b'"' not in completas:
+                # Bloco sem aspas: toda quebra de linha é fim de registro
+                alvo = inicio + bytes_por_fatia
+                while alvo <= base + len(completas):
+                    fim_linha = completas.find(b'\n', max(alvo - base - 1, 0))
+                    if fim_linha < 0: break
+                    fim = base + fim_linha + 1
+                    yield inicio, fim
+                    inicio = fim
+                    alvo = inicio + bytes_por_fatia
+            else:
+                i = 0
+                while i < len(completas):
+                    j = completas.find(b'\n', i)
+                    j = len(completas) if j < 0 else j + 1
+                    if entre_aspas or b'"' in completas[i:j]:
+                        entre_aspas = _termina_entre_aspas(completas[i:j], entre_aspas)
+                    i = j
+                    if not entre_aspas and base + i - inicio >= bytes_por_fatia:
+                        yield inicio, base + i
+                        inicio = base + i
+
+            pos = base + len(completas)
+            if not bloco: break
+
+        if pos > inicio:
+            yield inicio, pos
+
+
+def _tarefas(caminho, tamanho_lote, pesos, agrupar, manter_lote):
+    # Gera pares (tarefa enviada ao processo, lote completo mantido no principal ou None)
+    if _formato(caminho) == 'parquet':
+        _, pq = _importar_pyarrow()
+        for batch in pq.ParquetFile(caminho).iter_batches(batch_size=tamanho_lote):
+            df = _renomear_colunas(batch.to_pandas())
+            usadas = [c for c in df.columns if c in pesos or c in agrupar]
+            yield ('lote', df[usadas].copy()), (df if manter_lote else None)
+    else:
+        colunas = _colunas(caminho)
+        for inicio, fim in _fatias_csv(caminho, _bytes_por_fatia(caminho, tamanho_lote)):
+            yield ('csv', caminho, inicio, fim, colunas), None
+
+
+def _ler_fatia_csv(tarefa, pesos):
+    _, caminho, inicio, fim, colunas = tarefa
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        dados = f.read(fim - inicio)
+    # Tipos fixos em todas as fatias: critérios viram números depois, o resto é texto
+    dtype = {c: str for c in colunas if c not in pesos}
+    if not dados.strip():
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in colunas})
+    return pd.read_csv(io.BytesIO(dados), header=None, names=colunas, dtype=dtype)
+
+
+def _lote_vazio(caminho):
+    # Lote sem linhas com as colunas (e, no Parquet, os tipos) do arquivo de entrada
+    if _formato(caminho) == 'parquet':
+        _, pq = _importar_pyarrow()
+        return pq.ParquetFile(caminho).schema_arrow.empty_table().to_pandas()
+    return pd.DataFrame({c: pd.Series(dtype=object) for c in _colunas(caminho)})
+
+
+# ------------------------------------------------------------------------------
+# Escrita
+# ------------------------------------------------------------------------------
+
+class EscritorSaida:
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.formato = _formato(caminho)
+        # Só vira o arquivo final se a execução terminar sem erro
+        self._temporario = f"{caminho}.parcial"
+        self._writer = None
+        self._schema = None
+        self._primeiro = True
+
+    def escrever(self, df):
+        if self.formato == 'parquet':
+            pa, pq = _importar_pyarrow()
+            if self._writer is None:
+                tabela = pa.Table.from_pandas(df, preserve_index=False)
+                # Coluna vazia no primeiro lote é inferida como null: grava como texto
+                self._schema = pa.schema([pa.field(c.name, pa.string()) if pa.types.is_null(c.type) else c
+                                          for c in tabela.schema])
+                self._writer = pq.ParquetWriter(self._temporario, self._schema)
+            self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        else:
+            df.to_csv(self._temporario, mode='w' if self._primeiro else 'a', header=self._primeiro, index=False)
+        self._primeiro = False
+
+    def _fechar(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    @property
+    def vazio(self):
+        return self._primeiro
+
+    def concluir(self):
+        self._fechar()
+        if not self._primeiro:
+            os.replace(self._temporario, self.caminho)
+
+    def descartar(self):
+        self._fechar()
+        if os.path.exists(self._temporario):
+            os.remove(self._temporario)
+
+
+def _gravar_tabela(df, caminho):
+    temporario = f"{caminho}.parcial"
+    try:
+        if _formato(caminho) == 'parquet':
+            _importar_pyarrow()
+            df.to_parquet(temporario, index=False)
+        else:
+            df.to_csv(temporario, index=False)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario): os.remove(temporario)
+        raise
+
+
+# ------------------------------------------------------------------------------
+# Pontuação e agregação
+# ------------------------------------------------------------------------------
+
+def _renomear_colunas(df):
+    if 'Trimestre' in df.columns: df = df.rename(columns={'Trimestre': 'Periodo'})
+    return df
+
+
+def _normalizar_chave(serie):
+    # Chaves de agrupamento sempre como texto, iguais no CSV e no Parquet (2024.0 -> "2024")
+    texto = serie.astype(str).str.replace(r'^(-?\d+)\.0+$', r'\1', regex=True)
+    return texto.where(serie.notna(), np.nan).astype(object)
+
+
+def _normalizar_lote(df, pesos, agrupar):
+    df = _renomear_colunas(df)
+    for criterio in pesos:
+        if criterio in df.columns:
+            df[criterio] = pd.to_numeric(df[criterio], errors='coerce').astype('float64')
+    for coluna in agrupar:
+        df[coluna] = _normalizar_chave(df[coluna])
+    return df
+
+
+def _pontuar(df, pesos, agrupar):
+    df = _normalizar_lote(df, pesos, agrupar)
+    df[COL_SCORE] = calcular_notas_df(df, pesos)
+    parcial = df.groupby(agrupar, dropna=False)[COL_SCORE].agg(['sum', 'count', 'min', 'max'])
+    return df, parcial
+
+
+def _combinar_parciais(acumulado, parcial):
+    if acumulado is None:
+        return parcial
+    combinado = pd.concat([acumulado, parcial])
+    return combinado.groupby(level=list(range(combinado.index.nlevels)), dropna=False).agg(
+        {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'})
+
+
+def _processar_tarefa(tarefa, pesos, agrupar, devolver_dados):
+    # Executa no processo filho. CSV: lê a própria fatia e devolve o lote pontuado.
+    # Parquet: recebe só as colunas usadas e devolve apenas o Score Final.
+    if tarefa[0] == 'lote':
+        df, parcial = _pontuar(tarefa[1], pesos, agrupar)
+        return (df[COL_SCORE] if devolver_dados else None), parcial
+    df, parcial = _pontuar(_ler_fatia_csv(tarefa, pesos), pesos, agrupar)
+    return (df if devolver_dados else None), parcial
+
+
+def pontuar_em_paralelo(tarefas, pesos, agrupar, processos, devolver_dados):
+    if processos <= 1:
+        for tarefa, lote in tarefas:
+            yield lote, _processar_tarefa(tarefa, pesos, agrupar, devolver_dados)
+        return
+
+    # Janela limitada de tarefas em voo: preserva a ordem e não carrega o arquivo inteiro na memória
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        pendentes = deque()
+        for tarefa, lote in tarefas:
+            pendentes.append((lote, executor.submit(_processar_tarefa, tarefa, pesos, agrupar, devolver_dados)))
+            if len(pendentes) >= processos * 2:
+                lote, futuro = pendentes.popleft()
+                yield lote, futuro.result()
+        while pendentes:
+            lote, futuro = pendentes.popleft()
+            yield lote, futuro.result()
+
+
+def finalizar_agregados(acumulado, agrupar):
+    if acumulado is None:
+        return pd.DataFrame(columns=agrupar + COLS_AGREGADOS)
+    df = acumulado.copy()
+    df['Score Médio'] = df['sum'] / df['count']
+    df = df.rename(columns={'count': 'Avaliações', 'min': 'Score Mínimo', 'max': 'Score Máximo'})
+    df = df[COLS_AGREGADOS]
+    return df.sort_values('Score Médio', ascending=False).reset_index()
+
+
+def processar(entrada, tipo, config, saida=None, agregados=None, agrupar=('Nome',),
+              processos=1, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    pesos = config[chave_pesos(tipo)]
+    agrupar = list(agrupar)
+
+    colunas = ['Periodo' if c == 'Trimestre' else c for c in _colunas(entrada)]
+    faltando = [c for c in agrupar if c not in colunas]
+    if faltando:
+        raise ValueError(f"Colunas de agrupamento ausentes no arquivo: {faltando}")
+    if agregados: _formato(agregados)
+
+    escritor = EscritorSaida(saida) if saida else None
+    acumulado = None
+    try:
+        tarefas = _tarefas(entrada, tamanho_lote, pesos, agrupar, escritor is not None)
+        for lote, (dados, parcial) in pontuar_em_paralelo(tarefas, pesos, agrupar, processos, escritor is not None):
+            acumulado = _combinar_parciais(acumulado, parcial)
+            if escritor is None: continue
+            if lote is not None:
+                lote = _normalizar_lote(lote, pesos, agrupar)
+                lote[COL_SCORE] = dados
+                dados = lote
+            escritor.escrever(dados)
+        # Sem avaliações: grava mesmo assim só o cabeçalho/schema, para não sobrar arquivo antigo
+        if escritor and escritor.vazio:
+            escritor.escrever(_pontuar(_lote_vazio(entrada), pesos, agrupar)[0])
+    except BaseException:
+        if escritor: escritor.descartar()
+        raise
+    if escritor: escritor.concluir()
+
+    df_agg = finalizar_agregados(acumulado, agrupar)
+    if agregados: _gravar_tabela(df_agg, agregados)
+    return int(df_agg['Avaliações'].sum()), df_agg
+
+
+# ==============================================================================
+# CLI
+# ==============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Recalcula o Score Final de avaliações exportadas (CSV/Parquet) sem abrir o app.")
+    parser.add_argument('entrada', help="Arquivo de avaliações (.csv ou .parquet)")
+    parser.add_argument('--tipo', choices=['fornecedor', 'produto'], required=True,
+                        help="Define qual conjunto de pesos da configuração será usado")
+    parser.add_argument('--config', help="Configuração: .json ou exportação da aba 'config' (coluna JSON_DUMP). "
+                                         "Sem ela, usa os pesos padrão.")
+    parser.add_argument('--peso', action='append', metavar='CRITÉRIO=VALOR',
+                        help="Sobrescreve o peso de um critério (pode repetir)")
+    parser.add_argument('--saida', help="Arquivo de saída com as avaliações pontuadas (.csv ou .parquet)")
+    parser.add_argument('--agregados', help="Arquivo de saída com o ranking agregado (.csv ou .parquet)")
+    parser.add_argument('--agrupar', nargs='+', default=['Nome'],
+                        help="Colunas de agrupamento dos agregados (padrão: Nome)")
+    parser.add_argument('--processos', type=int, default=1,
+                        help="Número de processos paralelos. No CSV cada processo lê a sua fatia do arquivo; "
+                             "no Parquet o principal lê os lotes e os processos só pontuam (padrão: 1)")
+    parser.add_argument('--tamanho-lote', type=int, default=TAMANHO_LOTE_PADRAO,
+                        help=f"Linhas por lote, aproximado no CSV (padrão: {TAMANHO_LOTE_PADRAO})")
+    args = parser.parse_args(argv)
+
+    if args.tamanho_lote <= 0: parser.error("--tamanho-lote deve ser positivo")
+    if args.processos <= 0: parser.error("--processos deve ser positivo")
+
+    try:
+        config = carregar_config(args.config)
+        aplicar_pesos(config, args.tipo, args.peso)
+        total, df_agg = processar(args.entrada, args.tipo, config, saida=args.saida, agregados=args.agregados,
+                                  agrupar=args.agrupar, processos=args.processos, tamanho_lote=args.tamanho_lote)
+    except (ValueError, OSError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+    print(f"{total} avaliações pontuadas.")
+    if total:
+        media = (df_agg['Score Médio'] * df_agg['Avaliações']).sum() / df_agg['Avaliações'].sum()
+        print(f"Média Geral: {media:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
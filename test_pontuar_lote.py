@@ -0,0 +1,216 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pontuar_lote
+from nucleo_pontuacao import DEFAULT_CONFIG, calcular_nota, calcular_notas_df, mesclar_config
+from pontuar_lote import _tarefas, aplicar_pesos, processar
+
+PESOS = {'Preço': 2.0, 'Suporte': 1.0, 'Pontualidade': 0.5, 'Ausente': 1.0}
+
+
+def _avaliacoes():
+    return pd.DataFrame({
+        'Nome': ['A', 'B', None, 'A', 'B', None, 'C', 'A'],
+        'Ano': [2024, 2024, 2025, 2025, 2024, 2024, 2026, 2024],
+        'Preço': ['7', 'x', None, '7,5', 10, '', 3.5, '9'],
+        'Suporte': [8.5, 1, 2, None, 'abc', 4, 5, 6],
+        'Pontualidade': [1, 2, 3, 4, 5, 6, 7, 8],
+    })
+
+
+def _esperado(df, pesos, agrupar):
+    df = df.copy()
+    df['Score Final'] = df.apply(lambda row: calcular_nota(row, pesos), axis=1)
+    return (df.groupby(agrupar, dropna=False)['Score Final']
+              .agg(['count', 'mean', 'min', 'max'])
+              .sort_index())
+
+
+def test_calcular_notas_df_igual_a_calcular_nota():
+    df = _avaliacoes()
+    linha_a_linha = df.apply(lambda row: calcular_nota(row, PESOS), axis=1)
+    pd.testing.assert_series_equal(calcular_notas_df(df, PESOS), linha_a_linha, check_names=False)
+
+
+def test_calcular_notas_df_pesos_zerados():
+    df = _avaliacoes()
+    assert (calcular_notas_df(df, {'Preço': 0.0}) == 0.0).all()
+    assert calcular_nota(df.iloc[0], {'Preço': 0.0}) == 0.0
+
+
+def test_mesclar_config_preserva_padrao():
+    config = mesclar_config({'pesos_produtos': {'Rentabilidade': 3.0}, 'tipo_periodo': 'Mensal'})
+    assert config['pesos_produtos']['Rentabilidade'] == 3.0
+    assert config['pesos_produtos']['Inovação'] == 1.0
+    assert config['pesos_fornecedores'] == DEFAULT_CONFIG['pesos_fornecedores']
+    assert config['tipo_periodo'] == 'Mensal'
+    assert DEFAULT_CONFIG['pesos_produtos']['Rentabilidade'] == 1.0
+
+
+@pytest.mark.parametrize('valor', ['nan', 'inf', '-inf', 'abc', ''])
+def test_aplicar_pesos_rejeita_invalidos(valor):
+    with pytest.raises(ValueError):
+        aplicar_pesos(copy.deepcopy(DEFAULT_CONFIG), 'fornecedor', [f'Preço={valor}'])
+
+
+def test_aplicar_pesos():
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    aplicar_pesos(config, 'produto', ['Rentabilidade=2.5'])
+    assert config['pesos_produtos']['Rentabilidade'] == 2.5
+
+
+@pytest.mark.parametrize('tamanho_lote', [1, 3, 1000])
+@pytest.mark.parametrize('processos', [1, 2])
+def test_processar_csv_agregados(tmp_path, tamanho_lote, processos):
+    df = _avaliacoes()
+    entrada = tmp_path / 'avaliacoes.csv'
+    df.to_csv(entrada, index=False)
+    config = {'pesos_fornecedores': PESOS}
+
+    total, df_agg = processar(str(entrada), 'fornecedor', config, agrupar=['Nome', 'Ano'],
+                              processos=processos, tamanho_lote=tamanho_lote)
+
+    assert total == len(df)
+    lido = pd.read_csv(entrada, dtype={'Nome': str, 'Ano': str})
+    esperado = _esperado(lido, PESOS, ['Nome', 'Ano'])
+    obtido = df_agg.set_index(['Nome', 'Ano']).sort_index()
+    assert obtido.index.tolist() == esperado.index.tolist()
+    np.testing.assert_array_equal(obtido['Avaliações'], esperado['count'])
+    np.testing.assert_allclose(obtido['Score Médio'], esperado['mean'])
+    np.testing.assert_allclose(obtido['Score Mínimo'], esperado['min'])
+    np.testing.assert_allclose(obtido['Score Máximo'], esperado['max'])
+
+
+def test_processar_csv_campo_com_quebra_de_linha(tmp_path):
+    entrada = tmp_path / 'avaliacoes.csv'
+    entrada.write_text('Nome,Obs,Preço\nA,"linha 1\nlinha ""2""",8\nB,ok,4\nA,"x\n\ny",6\n', encoding='utf-8')
+
+    total, df_agg = processar(str(entrada), 'fornecedor', {'pesos_fornecedores': {'Preço': 1.0}},
+                              tamanho_lote=1)
+
+    assert total == 3
+    assert df_agg.set_index('Nome')['Score Médio'].to_dict() == {'A': 7.0, 'B': 4.0}
+
+
+@pytest.mark.parametrize('tamanho_lote', [1, 2, 3, 1000])
+@pytest.mark.parametrize('processos', [1, 2])
+@pytest.mark.parametrize('conteudo', [
+    'Nome,Obs,Preço\nA,tubo 5" aco,1\nB,"x\ny ""z""",2\nC, "a b",3\nD,ok,4\n',
+    '\n  \r\nNome,Obs,Preço\nA,ok,1\n\nB,"x\n\ny",2\nC,tubo 5" aco,3\n',
+    '\nNome,Obs,Preço\nA,ok,1\nB,,2\r\nC,fim,3',
+])
+def test_processar_csv_igual_ao_pandas(tmp_path, conteudo, tamanho_lote, processos):
+    entrada = tmp_path / 'avaliacoes.csv'
+    saida = tmp_path / 'pontuadas.csv'
+    entrada.write_bytes(conteudo.encode('utf-8'))
+    pesos = {'Preço': 1.0}
+
+    total, _ = processar(str(entrada), 'fornecedor', {'pesos_fornecedores': pesos}, saida=str(saida),
+                         processos=processos, tamanho_lote=tamanho_lote)
+
+    esperado = pd.read_csv(entrada, dtype={'Nome': str, 'Obs': str})
+    obtido = pd.read_csv(saida, dtype={'Nome': str, 'Obs': str})
+    assert total == len(esperado)
+    assert obtido['Nome'].tolist() == esperado['Nome'].tolist()
+    assert obtido['Obs'].tolist() == esperado['Obs'].tolist()
+    assert obtido['Score Final'].tolist() == calcular_notas_df(esperado, pesos).tolist()
+
+
+@pytest.mark.parametrize('sufixo', ['csv', 'parquet'])
+def test_processar_sem_linhas_grava_arquivos_vazios(tmp_path, sufixo):
+    if sufixo == 'parquet': pytest.importorskip('pyarrow')
+    entrada = tmp_path / 'avaliacoes.csv'
+    entrada.write_text('Nome,Ano,Trimestre,Preço\n', encoding='utf-8')
+    saida = tmp_path / f'pontuadas.{sufixo}'
+    agregados = tmp_path / f'ranking.{sufixo}'
+    saida.write_text('arquivo de ontem')
+    agregados.write_text('arquivo de ontem')
+
+    total, df_agg = processar(str(entrada), 'fornecedor', {'pesos_fornecedores': {'Preço': 1.0}},
+                              saida=str(saida), agregados=str(agregados), agrupar=['Nome', 'Ano'])
+
+    ler = pd.read_parquet if sufixo == 'parquet' else pd.read_csv
+    assert total == 0 and df_agg.empty
+    lido = ler(saida)
+    assert lido.empty
+    assert lido.columns.tolist() == ['Nome', 'Ano', 'Periodo', 'Preço', 'Score Final']
+    lido_agg = ler(agregados)
+    assert lido_agg.empty
+    assert lido_agg.columns.tolist() == ['Nome', 'Ano', 'Avaliações', 'Score Médio', 'Score Mínimo', 'Score Máximo']
+
+
+def test_processar_parquet_e_csv_mesmas_chaves(tmp_path):
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'Nome': ['A', 'B', 'A', None], 'Ano': [2024, None, 2025, 2024], 'Preço': [1, 2, 3, 4]})
+    df.to_csv(tmp_path / 'a.csv', index=False)
+    df.to_parquet(tmp_path / 'a.parquet', index=False)
+    config = {'pesos_fornecedores': {'Preço': 1.0}}
+
+    _, agg_csv = processar(str(tmp_path / 'a.csv'), 'fornecedor', config, agrupar=['Nome', 'Ano'])
+    _, agg_pq = processar(str(tmp_path / 'a.parquet'), 'fornecedor', config, agrupar=['Nome', 'Ano'],
+                          tamanho_lote=2)
+
+    pd.testing.assert_frame_equal(agg_pq, agg_csv)
+    assert sorted(agg_csv['Ano'].dropna()) == ['2024', '2024', '2025']
+
+
+def test_processar_parquet_divide_row_group_em_lotes(tmp_path):
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'Nome': [f'F{i % 3}' for i in range(10)], 'Preço': range(10)})
+    entrada = tmp_path / 'avaliacoes.parquet'
+    saida = tmp_path / 'pontuadas.parquet'
+    df.to_parquet(entrada, index=False)
+    pesos = {'Preço': 1.0}
+
+    assert len(list(_tarefas(str(entrada), 3, pesos, ['Nome'], False))) == 4
+    total, _ = processar(str(entrada), 'fornecedor', {'pesos_fornecedores': pesos}, saida=str(saida),
+                         processos=2, tamanho_lote=3)
+
+    assert total == 10
+    lido = pd.read_parquet(saida)
+    assert lido['Nome'].tolist() == df['Nome'].tolist()
+    assert lido['Score Final'].tolist() == [float(i) for i in range(10)]
+
+
+def test_processar_csv_para_parquet_coluna_vazia_no_inicio(tmp_path):
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'Nome': list('ABCDEFGHIJ'), 'Preço': range(10),
+                       'Obs': [None] * 5 + ['x'] * 5})
+    entrada = tmp_path / 'avaliacoes.csv'
+    saida = tmp_path / 'pontuadas.parquet'
+    df.to_csv(entrada, index=False)
+
+    total, _ = processar(str(entrada), 'fornecedor', {'pesos_fornecedores': {'Preço': 1.0}},
+                         saida=str(saida), tamanho_lote=5, processos=2)
+
+    assert total == 10
+    lido = pd.read_parquet(saida)
+    assert lido['Obs'].isna().tolist() == [True] * 5 + [False] * 5
+    assert lido['Obs'].iloc[5:].tolist() == ['x'] * 5
+    assert lido['Score Final'].tolist() == [float(i) for i in range(10)]
+    assert not (tmp_path / 'pontuadas.parquet.parcial').exists()
+
+
+def test_processar_falha_nao_deixa_saida(tmp_path, monkeypatch):
+    df = pd.DataFrame({'Nome': list('ABCDEF'), 'Preço': range(6)})
+    entrada = tmp_path / 'avaliacoes.csv'
+    saida = tmp_path / 'pontuadas.csv'
+    df.to_csv(entrada, index=False)
+
+    chamadas = []
+
+    def falha_no_segundo_lote(df, pesos):
+        chamadas.append(1)
+        if len(chamadas) > 1:
+            raise ValueError("falha simulada")
+        return calcular_notas_df(df, pesos)
+
+    monkeypatch.setattr(pontuar_lote, 'calcular_notas_df', falha_no_segundo_lote)
+    with pytest.raises(ValueError):
+        processar(str(entrada), 'fornecedor', {'pesos_fornecedores': {'Preço': 1.0}},
+                  saida=str(saida), tamanho_lote=1)
+
+    assert list(tmp_path.iterdir()) == [entrada]